@@ -27,12 +27,14 @@ from setuptools import find_packages, setup
 
 MAIN_REQUIREMENTS = [
     "airbyte-cdk~=0.1",
-    "pendulum~=2.1",
+    "ciso8601~=2.3",
+    "orjson~=3.6",
     "requests~=2.25",
 ]
 
 TEST_REQUIREMENTS = [
     "pytest~=6.1",
+    "requests_mock==1.8.0",
 ]
 
 setup(
@@ -24,12 +24,15 @@
 
 from typing import Any, List, Mapping, Tuple
 
+import requests
 from airbyte_cdk.logger import AirbyteLogger
 from airbyte_cdk.models import SyncMode
 from airbyte_cdk.sources import AbstractSource
 from airbyte_cdk.sources.streams import Stream
+from requests.adapters import HTTPAdapter
 from source_twilio.auth import HttpBasicAuthenticator
 from source_twilio.streams import (
+    TWILIO_CONNECTION_RETRIES,
     Accounts,
     Addresses,
     Alerts,
@@ -50,6 +53,7 @@ from source_twilio.streams import (
     Queues,
     Recordings,
     Transcriptions,
+    TwilioNestedStream,
     UsageRecords,
     UsageTriggers,
 )
@@ -80,31 +84,48 @@ class SourceTwilio(AbstractSource):
                 config["auth_token"],
             ),
         )
-        full_refresh_stream_kwargs = {"authenticator": auth}
-        incremental_stream_kwargs = {"authenticator": auth, "start_date": config["start_date"]}
+        # One keep-alive connection pool for all the streams, so TLS sessions are reused across them.
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=TWILIO_CONNECTION_RETRIES))
 
-        streams = [
-            Accounts(**full_refresh_stream_kwargs),
-            Addresses(**full_refresh_stream_kwargs),
-            Alerts(**incremental_stream_kwargs),
-            Applications(**full_refresh_stream_kwargs),
-            AvailablePhoneNumberCountries(**full_refresh_stream_kwargs),
-            AvailablePhoneNumbersLocal(**full_refresh_stream_kwargs),
-            AvailablePhoneNumbersMobile(**full_refresh_stream_kwargs),
-            AvailablePhoneNumbersTollFree(**full_refresh_stream_kwargs),
-            Calls(**incremental_stream_kwargs),
-            ConferenceParticipants(**full_refresh_stream_kwargs),
-            Conferences(**incremental_stream_kwargs),
-            DependentPhoneNumbers(**full_refresh_stream_kwargs),
-            IncomingPhoneNumbers(**full_refresh_stream_kwargs),
-            Keys(**full_refresh_stream_kwargs),
-            MessageMedia(**incremental_stream_kwargs),
-            Messages(**incremental_stream_kwargs),
-            OutgoingCallerIds(**full_refresh_stream_kwargs),
-            Queues(**full_refresh_stream_kwargs),
-            Recordings(**incremental_stream_kwargs),
-            Transcriptions(**full_refresh_stream_kwargs),
-            UsageRecords(**incremental_stream_kwargs),
-            UsageTriggers(**full_refresh_stream_kwargs),
-        ]
-        return streams
+        full_refresh_stream_kwargs = {"authenticator": auth, "session": session}
+        incremental_stream_kwargs = {"authenticator": auth, "session": session, "start_date": config["start_date"]}
+
+        stream_kwargs = {
+            Accounts: full_refresh_stream_kwargs,
+            Addresses: full_refresh_stream_kwargs,
+            Alerts: incremental_stream_kwargs,
+            Applications: full_refresh_stream_kwargs,
+            AvailablePhoneNumberCountries: full_refresh_stream_kwargs,
+            AvailablePhoneNumbersLocal: full_refresh_stream_kwargs,
+            AvailablePhoneNumbersMobile: full_refresh_stream_kwargs,
+            AvailablePhoneNumbersTollFree: full_refresh_stream_kwargs,
+            Calls: incremental_stream_kwargs,
+            ConferenceParticipants: full_refresh_stream_kwargs,
+            Conferences: incremental_stream_kwargs,
+            DependentPhoneNumbers: full_refresh_stream_kwargs,
+            IncomingPhoneNumbers: full_refresh_stream_kwargs,
+            Keys: full_refresh_stream_kwargs,
+            MessageMedia: incremental_stream_kwargs,
+            Messages: incremental_stream_kwargs,
+            OutgoingCallerIds: full_refresh_stream_kwargs,
+            Queues: full_refresh_stream_kwargs,
+            Recordings: incremental_stream_kwargs,
+            Transcriptions: full_refresh_stream_kwargs,
+            UsageRecords: incremental_stream_kwargs,
+            UsageTriggers: full_refresh_stream_kwargs,
+        }
+        instances = {}
+
+        def get_stream(stream_cls, as_parent: bool = False):
+            # Nested streams get the instance of their parent stream injected, so each parent is built and read through once.
+            # Parents are always read as full refresh, so they are built apart from the synced streams, without start_date.
+            key = (stream_cls, as_parent)
+            if key not in instances:
+                kwargs = full_refresh_stream_kwargs if as_parent else stream_kwargs[stream_cls]
+                if issubclass(stream_cls, TwilioNestedStream):
+                    kwargs = {**kwargs, "parent_instance": get_stream(stream_cls.parent_stream, as_parent=True)}
+                instances[key] = stream_cls(**kwargs)
+            return instances[key]
+
+        return [get_stream(stream_cls) for stream_cls in stream_kwargs]
@@ -23,28 +23,99 @@
 #
 
 from abc import ABC, abstractmethod
-from typing import Any, Iterable, Mapping, MutableMapping, Optional
-from urllib.parse import parse_qsl, urlparse
-
-import pendulum
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from threading import Event
+from typing import Any, Iterable, List, Mapping, MutableMapping, Optional
+from urllib.parse import unquote_plus
+
+import ciso8601
+import orjson
 import requests
 from airbyte_cdk.models import SyncMode
 from airbyte_cdk.sources.streams.http import HttpStream
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 TWILIO_API_URL_BASE = "https://api.twilio.com"
 TWILIO_API_URL_BASE_VERSIONED = f"{TWILIO_API_URL_BASE}/2010-04-01/"
 TWILIO_MONITOR_URL_BASE = "https://monitor.twilio.com/v1/"
+# urllib3 only retries failed connections and reads, responses with error statuses (429, 5xx) are left to the CDK backoff handlers
+TWILIO_CONNECTION_RETRIES = Retry(total=5, backoff_factor=0.3, status=0, status_forcelist=(), raise_on_status=False)
+
+
+def _json(response: requests.Response) -> Mapping[str, Any]:
+    """
+    Decode the response body straight from bytes, skipping the charset detection and stdlib decoder of response.json()
+    """
+    return orjson.loads(response.content)
+
+
+def _parse_query(uri: str) -> Mapping[str, str]:
+    """
+    Single pass over the query string of the uri. Paging parameters are mostly plain alphanumerics,
+    so only the parameters containing escapes are unquoted. Blank values are dropped, like parse_qsl does.
+    """
+    params = {}
+    for part in uri.partition("?")[2].split("&"):
+        key, _, value = part.partition("=")
+        if not value:
+            continue
+        if "%" in part or "+" in part:
+            key, value = unquote_plus(key), unquote_plus(value)
+        params[key] = value
+    return params
+
+
+def _parse_datetime(value: str) -> datetime:
+    """
+    Parse ISO 8601 values (state, config and monitor/usage resources) with ciso8601, and the RFC 2822 dates of
+    the 2010-04-01 API resources (e.g. "Tue, 31 Aug 2010 20:36:28 +0000") with the email utils. Naive values are treated as UTC.
+    """
+    if value[:1].isdigit():
+        parsed = ciso8601.parse_datetime(value)
+    else:
+        parsed = parsedate_to_datetime(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
 
 
 class TwilioStream(HttpStream, ABC):
     url_base = TWILIO_API_URL_BASE
     primary_key = "sid"
-    page_size = 100
+    # the largest PageSize the list endpoints accept. A page is decoded whole, so a 1000-record page of the largest records
+    # (about 1 MB of Messages JSON) is held as bytes and dicts at once, per stream and per parent walk in flight
+    page_size = 1000
+    # nested streams read the parent stream once per sync and share its records when set
+    cache_records = False
+
+    def __init__(self, session: requests.Session = None, **kwargs):
+        super().__init__(**kwargs)
+        if session:
+            self._session = session
+        else:
+            self._session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=TWILIO_CONNECTION_RETRIES))
+        self._cached_records = None
 
     @property
     def data_field(self):
         return self.name
 
+    def read_cached_records(self) -> List[Mapping[str, Any]]:
+        """
+        :return: all the records of the stream read as full refresh, materialized on the first call and kept with this instance,
+        so the nested streams sharing the instance read it once per sync
+        """
+        if self._cached_records is None:
+            stream_slices = self.stream_slices(sync_mode=SyncMode.full_refresh, cursor_field=self.cursor_field)
+            self._cached_records = [
+                record
+                for stream_slice in stream_slices
+                for record in self.read_records(sync_mode=SyncMode.full_refresh, stream_slice=stream_slice, cursor_field=self.cursor_field)
+            ]
+        return self._cached_records
+
     @property
     def changeable_fields(self):
         """
@@ -53,27 +124,33 @@ class TwilioStream(HttpStream, ABC):
         return []
 
     def path(self, **kwargs):
-        return f"{self.name.title()}.json"
+        # the stream name is fixed per class, so the default path is built on first use and kept on the class
+        stream_cls = type(self)
+        path = stream_cls.__dict__.get("_path")
+        if path is None:
+            path = stream_cls._path = f"{self.name.title()}.json"
+        return path
 
     def next_page_token(self, response: requests.Response) -> Optional[Mapping[str, Any]]:
-        stream_data = response.json()
+        stream_data = _json(response)
         next_page_uri = stream_data.get("next_page_uri")
         if next_page_uri:
-            next_url = urlparse(next_page_uri)
-            next_page_params = dict(parse_qsl(next_url.query))
-            return next_page_params
+            return _parse_query(next_page_uri)
 
     def parse_response(self, response: requests.Response, stream_state: Mapping[str, Any], **kwargs) -> Iterable[Mapping]:
         """
         :return an iterable containing each record in the response
         """
-        records = response.json().get(self.data_field, [])
-        if self.changeable_fields:
-            for record in records:
-                for field in self.changeable_fields:
-                    record.pop(field, None)
-                    yield record
-        yield from records
+        records = _json(response).get(self.data_field, ())
+        changeable_fields = self.changeable_fields
+        if not changeable_fields:
+            yield from records
+            return
+        for record in records:
+            pop = record.pop
+            for field in changeable_fields:
+                pop(field, None)
+            yield record
 
     def request_params(
         self, stream_state: Mapping[str, Any], next_page_token: Mapping[str, Any] = None, **kwargs
@@ -92,6 +169,8 @@ class IncrementalTwilioStream(TwilioStream, ABC):
     def __init__(self, start_date: str = None, **kwargs):
         super().__init__(**kwargs)
         self._start_date = start_date
+        # (state value, parsed datetime) of the latest state, so the state is not parsed again for every record
+        self._parsed_state = None
 
     @property
     @abstractmethod
@@ -103,25 +182,33 @@ class IncrementalTwilioStream(TwilioStream, ABC):
     def get_updated_state(self, current_stream_state: MutableMapping[str, Any], latest_record: Mapping[str, Any]) -> Mapping[str, Any]:
         """
         Return the latest state by comparing the cursor value in the latest record with the stream's most recent state object
-        and returning an updated state object.
+        and returning an updated state object. Records without a cursor value (e.g. calls in progress) leave the state as is.
         """
-        latest_benchmark = pendulum.parse(latest_record[self.cursor_field], strict=False).strftime(self.time_filter_template)
-        if current_stream_state.get(self.cursor_field):
-            return {self.cursor_field: max(latest_benchmark, current_stream_state[self.cursor_field])}
-        return {self.cursor_field: latest_benchmark}
+        latest_cursor_value = latest_record.get(self.cursor_field)
+        if not latest_cursor_value:
+            return current_stream_state
+        latest_benchmark = _parse_datetime(latest_cursor_value)
+        current_cursor_value = current_stream_state.get(self.cursor_field)
+        if current_cursor_value:
+            if not self._parsed_state or self._parsed_state[0] != current_cursor_value:
+                self._parsed_state = (current_cursor_value, _parse_datetime(current_cursor_value))
+            if latest_benchmark <= self._parsed_state[1]:
+                return current_stream_state
+        return {self.cursor_field: latest_benchmark.strftime(self.time_filter_template)}
 
     def request_params(self, stream_state: Mapping[str, Any], **kwargs) -> MutableMapping[str, Any]:
         params = super().request_params(stream_state=stream_state, **kwargs)
         start_date = stream_state.get(self.cursor_field) or self._start_date
         if start_date:
-            params.update({self.incremental_filter_field: pendulum.parse(start_date, strict=False).strftime(self.time_filter_template)})
+            params.update({self.incremental_filter_field: _parse_datetime(start_date).strftime(self.time_filter_template)})
         return params
 
     def read_records(self, stream_state: Mapping[str, Any] = None, **kwargs):
         stream_state = stream_state or {}
         records = super().read_records(stream_state=stream_state, **kwargs)
         for record in records:
-            record[self.cursor_field] = pendulum.parse(record[self.cursor_field], strict=False).strftime(self.time_filter_template)
+            if record.get(self.cursor_field):
+                record[self.cursor_field] = _parse_datetime(record[self.cursor_field]).strftime(self.time_filter_template)
             yield record
 
 
@@ -132,6 +219,13 @@ class TwilioNestedStream(TwilioStream):
     """
 
     media_exist_validation = {}
+    parent_prefetch_workers = 8
+
+    def __init__(self, parent_instance: TwilioStream = None, **kwargs):
+        super().__init__(**kwargs)
+        self._validation_items = tuple(self.media_exist_validation.items())
+        self._subresource_uri_key = self.subresource_uri_key
+        self._parent_instance = parent_instance
 
     def path(self, stream_slice: Mapping[str, Any], **kwargs):
         return stream_slice["subresource_uri"]
@@ -147,27 +241,85 @@ class TwilioNestedStream(TwilioStream):
         :return: parent stream class
         """
 
+    @property
+    def parent_instance(self) -> TwilioStream:
+        """
+        :return: injected parent stream instance, built on first use when the stream is created on its own
+        """
+        if not self._parent_instance:
+            self._parent_instance = self.parent_stream(authenticator=self.authenticator, session=self._session)
+        return self._parent_instance
+
+    def get_slice_from_parent_record(self, item: Mapping[str, Any]) -> Optional[Mapping[str, Any]]:
+        """
+        :return: stream slice built from the parent stream record, or None if the record should be skipped
+        """
+        subresource_uris = item.get("subresource_uris")
+        subresource_uri = subresource_uris and subresource_uris.get(self._subresource_uri_key)
+        if not subresource_uri:
+            return None
+        get = item.get
+        for key, value in self._validation_items:
+            item_value = get(key)
+            if not item_value or item_value == value:
+                return None
+        return {"subresource_uri": subresource_uri}
+
+    def _read_parent_slice(self, stream_instance: TwilioStream, stream_slice: Mapping[str, Any], stop: Event) -> List[Mapping[str, Any]]:
+        """
+        :return: child slices built from the parent stream slice, cut short once stop is set
+        """
+        records = stream_instance.read_records(
+            sync_mode=SyncMode.full_refresh, stream_slice=stream_slice, cursor_field=stream_instance.cursor_field
+        )
+        child_slices = []
+        for record in records:
+            if stop.is_set():
+                break
+            child_slice = self.get_slice_from_parent_record(record)
+            if child_slice:
+                child_slices.append(child_slice)
+        return child_slices
+
     def stream_slices(self, **kwargs) -> Iterable[Optional[Mapping[str, any]]]:
-        stream_instance = self.parent_stream(authenticator=self.authenticator)
-        stream_slices = stream_instance.stream_slices(sync_mode=SyncMode.full_refresh, cursor_field=stream_instance.cursor_field)
-        for stream_slice in stream_slices:
-            for item in stream_instance.read_records(
-                sync_mode=SyncMode.full_refresh, stream_slice=stream_slice, cursor_field=stream_instance.cursor_field
-            ):
-                if item.get("subresource_uris", {}).get(self.subresource_uri_key):
-                    validated = True
-                    for key, value in self.media_exist_validation.items():
-                        validated = item.get(key) and item.get(key) != value
-                        if not validated:
-                            break
-                    if validated:
-                        yield {"subresource_uri": item["subresource_uris"][self.subresource_uri_key]}
+        """
+        Parents with cache_records set are read once per sync and shared between the nested streams.
+        Other parent stream slices are read concurrently, each of them is a separate chain of paginated requests,
+        with at most parent_prefetch_workers of them in flight. Slices are yielded in the order the parent slices complete.
+        """
+        stream_instance = self.parent_instance
+        if stream_instance.cache_records:
+            records = stream_instance.read_cached_records()
+            yield from filter(None, map(self.get_slice_from_parent_record, records))
+            return
+
+        stream_slices = iter(stream_instance.stream_slices(sync_mode=SyncMode.full_refresh, cursor_field=stream_instance.cursor_field))
+        executor = ThreadPoolExecutor(max_workers=self.parent_prefetch_workers)
+        stop = Event()
+        pending = set()
+        try:
+            for stream_slice in islice(stream_slices, self.parent_prefetch_workers):
+                pending.add(executor.submit(self._read_parent_slice, stream_instance, stream_slice, stop))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                # keep the pool busy with the next parent slices while the completed ones are consumed
+                for stream_slice in islice(stream_slices, len(done)):
+                    pending.add(executor.submit(self._read_parent_slice, stream_instance, stream_slice, stop))
+                for future in done:
+                    yield from future.result()
+        finally:
+            # on error or early close the parent walks not started yet are dropped, the running ones stop at their next record
+            stop.set()
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
 
 
 class Accounts(TwilioStream):
     """https://www.twilio.com/docs/usage/api/account#read-multiple-account-resources"""
 
     url_base = TWILIO_API_URL_BASE_VERSIONED
+    cache_records = True
 
 
 class Addresses(TwilioNestedStream):
@@ -185,14 +337,8 @@ class DependentPhoneNumbers(TwilioNestedStream):
     def path(self, stream_slice: Mapping[str, Any], **kwargs):
         return f"Accounts/{stream_slice['account_sid']}/Addresses/{stream_slice['sid']}/DependentPhoneNumbers.json"
 
-    def stream_slices(self, **kwargs) -> Iterable[Optional[Mapping[str, any]]]:
-        stream_instance = self.parent_stream(authenticator=self.authenticator)
-        stream_slices = stream_instance.stream_slices(sync_mode=SyncMode.full_refresh, cursor_field=stream_instance.cursor_field)
-        for stream_slice in stream_slices:
-            for item in stream_instance.read_records(
-                sync_mode=SyncMode.full_refresh, stream_slice=stream_slice, cursor_field=stream_instance.cursor_field
-            ):
-                yield {"sid": item["sid"], "account_sid": item["account_sid"]}
+    def get_slice_from_parent_record(self, item: Mapping[str, Any]) -> Optional[Mapping[str, Any]]:
+        return {"sid": item["sid"], "account_sid": item["account_sid"]}
 
 
 class Applications(TwilioNestedStream):
@@ -213,6 +359,8 @@ class AvailablePhoneNumberCountries(TwilioNestedStream):
     data_field = "countries"
     subresource_uri_key = "available_phone_numbers"
     primary_key = None
+    # read once for the local, mobile and toll free numbers streams
+    cache_records = True
 
 
 class AvailablePhoneNumbersLocal(TwilioNestedStream):
@@ -273,10 +421,10 @@ class Conferences(TwilioNestedStream, IncrementalTwilioStream):
         """
         :return an iterable containing each record in the response
         """
-        records = response.json().get(self.data_field, [])
+        records = _json(response).get(self.data_field, [])
         if stream_state.get(self.cursor_field):
             for record in records:
-                if pendulum.parse(record[self.cursor_field], strict=False) <= pendulum.parse(stream_state[self.cursor_field], strict=False):
+                if _parse_datetime(record[self.cursor_field]) <= _parse_datetime(stream_state[self.cursor_field]):
                     yield record
         yield from records
 
@@ -351,14 +499,8 @@ class UsageNestedStream(TwilioNestedStream):
     def path(self, stream_slice: Mapping[str, Any], **kwargs):
         return f"Accounts/{stream_slice['account_sid']}/Usage/{self.path_name}.json"
 
-    def stream_slices(self, **kwargs) -> Iterable[Optional[Mapping[str, any]]]:
-        stream_instance = self.parent_stream(authenticator=self.authenticator)
-        stream_slices = stream_instance.stream_slices(sync_mode=SyncMode.full_refresh, cursor_field=stream_instance.cursor_field)
-        for stream_slice in stream_slices:
-            for item in stream_instance.read_records(
-                sync_mode=SyncMode.full_refresh, stream_slice=stream_slice, cursor_field=stream_instance.cursor_field
-            ):
-                yield {"account_sid": item["sid"]}
+    def get_slice_from_parent_record(self, item: Mapping[str, Any]) -> Optional[Mapping[str, Any]]:
+        return {"account_sid": item["sid"]}
 
 
 class UsageRecords(UsageNestedStream, IncrementalTwilioStream):
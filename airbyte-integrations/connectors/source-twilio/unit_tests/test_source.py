@@ -0,0 +1,75 @@
+#
+# MIT License
+#
+# Copyright (c) 2020 Airbyte
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+
+import pytest
+from source_twilio.source import SourceTwilio
+from source_twilio.streams import Accounts, TwilioNestedStream
+from urllib3.exceptions import MaxRetryError, ProtocolError
+from urllib3.response import HTTPResponse
+
+CONFIG = {"account_sid": "AC1", "auth_token": "token", "start_date": "2020-01-01T00:00:00Z"}
+
+
+@pytest.mark.parametrize("stream", [SourceTwilio().streams(CONFIG)[0], Accounts()], ids=["injected_session", "own_session"])
+def test_only_connection_errors_are_retried_by_urllib3(stream):
+    retries = stream._session.get_adapter("https://api.twilio.com").max_retries
+
+    # error statuses go straight back to the CDK backoff handlers, which decide whether and when to retry
+    for status, headers in [(429, {"Retry-After": "1"}), (500, {}), (503, {"Retry-After": "1"})]:
+        with pytest.raises(MaxRetryError):
+            retries.increment("GET", "/", response=HTTPResponse(status=status, headers=headers))
+    assert not retries.raise_on_status
+    assert retries.increment("GET", "/", error=ProtocolError("Connection aborted")).total == retries.total - 1
+
+
+def parent_chain(stream):
+    while isinstance(stream, TwilioNestedStream):
+        stream = stream.parent_instance
+        yield stream
+
+
+def test_streams_share_parent_instances_and_session():
+    streams = {stream.name: stream for stream in SourceTwilio().streams(CONFIG)}
+    parents = [parent for stream in streams.values() for parent in parent_chain(stream)]
+
+    assert len({id(stream._session) for stream in [*streams.values(), *parents]}) == 1
+    # one instance per parent stream class, shared by all its children and the children of its children
+    parents_by_class = {}
+    for parent in parents:
+        assert parents_by_class.setdefault(type(parent), parent) is parent
+    assert streams["addresses"].parent_instance is streams["dependent_phone_numbers"].parent_instance.parent_instance
+    for name in ["available_phone_numbers_local", "available_phone_numbers_mobile", "available_phone_numbers_toll_free"]:
+        assert streams[name].parent_instance is parents_by_class[type(streams["available_phone_number_countries"])]
+
+
+def test_injected_parents_are_read_without_start_date():
+    streams = {stream.name: stream for stream in SourceTwilio().streams(CONFIG)}
+    parents = {id(parent): parent for stream in streams.values() for parent in parent_chain(stream)}
+
+    assert streams["messages"]._start_date == CONFIG["start_date"]
+    assert streams["message_media"].parent_instance is not streams["messages"]
+    assert streams["conference_participants"].parent_instance is not streams["conferences"]
+    for parent in parents.values():
+        assert getattr(parent, "_start_date", None) is None
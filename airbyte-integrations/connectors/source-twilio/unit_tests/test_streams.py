@@ -0,0 +1,356 @@
+#
+# MIT License
+#
+# Copyright (c) 2020 Airbyte
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+from datetime import datetime, timezone
+from threading import Event, Lock
+from urllib.parse import parse_qs, parse_qsl, urlparse
+
+import pytest
+import requests
+from airbyte_cdk.models import SyncMode
+from source_twilio.streams import (
+    Accounts,
+    Addresses,
+    Applications,
+    AvailablePhoneNumberCountries,
+    AvailablePhoneNumbersLocal,
+    AvailablePhoneNumbersMobile,
+    AvailablePhoneNumbersTollFree,
+    Calls,
+    Conferences,
+    Keys,
+    Messages,
+    UsageRecords,
+    _parse_datetime,
+    _parse_query,
+)
+
+MESSAGES_URI = "/2010-04-01/Accounts/AC1/Messages.json"
+ACCOUNT_SIDS = ["AC1", "AC2"]
+
+
+def test_messages_pagination(requests_mock):
+    first_page = {
+        "messages": [{"sid": "SM1", "date_sent": "Tue, 31 Aug 2010 20:36:28 +0000"}, {"sid": "SM2", "date_sent": None}],
+        "next_page_uri": f"{MESSAGES_URI}?PageSize=1000&DateSent%3E=2020-01-01T00%3A00%3A00Z&Page=1&PageToken=PASM2",
+    }
+    last_page = {"messages": [{"sid": "SM3", "date_sent": "Wed, 01 Sep 2010 08:00:00 +0000"}], "next_page_uri": None}
+    requests_mock.get(
+        f"https://api.twilio.com{MESSAGES_URI}",
+        [{"json": first_page}, {"json": last_page}],
+    )
+    stream = Messages(start_date="2020-01-01T00:00:00Z")
+
+    records = list(stream.read_records(sync_mode=SyncMode.full_refresh, stream_slice={"subresource_uri": MESSAGES_URI}))
+
+    assert [record["sid"] for record in records] == ["SM1", "SM2", "SM3"]
+    assert records[0]["date_sent"] == "2010-08-31T20:36:28Z"
+    assert records[1]["date_sent"] is None
+    assert requests_mock.call_count == 2
+    second_request_params = parse_qs(urlparse(requests_mock.request_history[1].url).query)
+    assert second_request_params["PageToken"] == ["PASM2"]
+    assert second_request_params["DateSent>"] == ["2020-01-01T00:00:00Z"]
+
+
+def test_next_page_token_does_not_depend_on_parsing(requests_mock):
+    requests_mock.get("https://api.twilio.com/page", json={"messages": [{"sid": "SM1"}], "next_page_uri": f"{MESSAGES_URI}?PageToken=PA1"})
+    response = requests.get("https://api.twilio.com/page")
+    stream = Messages()
+
+    assert stream.next_page_token(response) == {"PageToken": "PA1"}
+    assert [record["sid"] for record in stream.parse_response(response, stream_state={})] == ["SM1"]
+    assert stream.next_page_token(response) == {"PageToken": "PA1"}
+
+
+@pytest.mark.parametrize(
+    "uri",
+    [
+        "/2010-04-01/Accounts/AC1/Messages.json?PageSize=1000&DateSent%3E=2020-01-01T00%3A00%3A00Z&Page=1&PageToken=PASM2",
+        "/2010-04-01/Accounts/AC1/Calls.json?PageSize=1000&EndTime%3E=2020-01-01T00%3A00%3A00Z&Page=2&PageToken=PACA3",
+        "/2010-04-01/Accounts/AC1/Conferences.json?DateUpdated%3E=2020-01-01&PageSize=50&Page=1&PageToken=PACF1",
+        "/2010-04-01/Accounts/AC1/Usage/Records.json?StartDate=2020-01-01&PageSize=1000&Page=1&PageToken=PAUR1",
+        "/2010-04-01/Accounts.json?PageSize=1000&Page=1&PageToken=PAAC1",
+        "/2010-04-01/Accounts.json?PageToken=PA%2Babc&FriendlyName=my+account",
+        "/2010-04-01/Accounts.json?PageSize=&Page=1&&PageToken=PA1",
+        "/2010-04-01/Accounts.json",
+    ],
+)
+def test_parse_query_matches_parse_qsl(uri):
+    assert _parse_query(uri) == dict(parse_qsl(urlparse(uri).query))
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("Tue, 31 Aug 2010 20:36:28 +0000", datetime(2010, 8, 31, 20, 36, 28, tzinfo=timezone.utc)),
+        ("Tue, 31 Aug 2010 22:36:28 +0200", datetime(2010, 8, 31, 20, 36, 28, tzinfo=timezone.utc)),
+        ("Tue, 31 Aug 2010 20:36:28 -0000", datetime(2010, 8, 31, 20, 36, 28, tzinfo=timezone.utc)),
+        ("2010-08-31T20:36:28Z", datetime(2010, 8, 31, 20, 36, 28, tzinfo=timezone.utc)),
+        ("2010-08-31T22:36:28+02:00", datetime(2010, 8, 31, 20, 36, 28, tzinfo=timezone.utc)),
+        ("2010-08-31T20:36:28", datetime(2010, 8, 31, 20, 36, 28, tzinfo=timezone.utc)),
+        ("2010-08-31", datetime(2010, 8, 31, tzinfo=timezone.utc)),
+    ],
+)
+def test_parse_datetime(value, expected):
+    parsed = _parse_datetime(value)
+    assert parsed == expected
+    assert parsed.tzinfo is not None
+
+
+def test_updated_state_does_not_move_backwards():
+    stream = Messages()
+    state = {}
+    for date_sent, expected in [
+        ("2020-01-02T00:00:00Z", "2020-01-02T00:00:00Z"),
+        ("2020-01-01T00:00:00Z", "2020-01-02T00:00:00Z"),
+        ("2020-03-01T10:00:00Z", "2020-03-01T10:00:00Z"),
+        ("2020-02-01T00:00:00Z", "2020-03-01T10:00:00Z"),
+    ]:
+        state = stream.get_updated_state(state, {"date_sent": date_sent})
+        assert state == {"date_sent": expected}
+
+
+@pytest.mark.parametrize("record", [{"date_sent": None}, {"date_sent": ""}, {}])
+def test_updated_state_without_cursor_value(record):
+    stream = Messages()
+    assert stream.get_updated_state({"date_sent": "2020-01-02T00:00:00Z"}, record) == {"date_sent": "2020-01-02T00:00:00Z"}
+    assert stream.get_updated_state({}, record) == {}
+
+
+def test_updated_state_with_date_template():
+    stream = Conferences()
+    state = {"date_updated": "2020-01-05"}
+    state = stream.get_updated_state(state, {"date_updated": "2020-01-04T00:00:00Z"})
+    assert state == {"date_updated": "2020-01-05"}
+    state = stream.get_updated_state(state, {"date_updated": "2020-01-05T10:00:00Z"})
+    assert state == {"date_updated": "2020-01-05"}
+    state = stream.get_updated_state(state, {"date_updated": "2020-01-06T00:00:00Z"})
+    assert state == {"date_updated": "2020-01-06"}
+
+
+class FakeParentStream:
+    """Parent stream whose slices are read by the given function instead of paginated requests"""
+
+    cache_records = False
+    cursor_field = []
+
+    def __init__(self, slices, read):
+        self.slices = slices
+        self.read = read
+        self.pulled = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = Lock()
+
+    def stream_slices(self, **kwargs):
+        for stream_slice in self.slices:
+            self.pulled += 1
+            yield stream_slice
+
+    def read_records(self, stream_slice, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield from self.read(stream_slice)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def parent_record(stream_slice, index=0):
+    return {"subresource_uris": {"addresses": f"/{stream_slice}/{index}/Addresses.json"}}
+
+
+def nested_stream(parent, workers):
+    stream = Addresses(parent_instance=parent)
+    stream.parent_prefetch_workers = workers
+    return stream
+
+
+def test_parent_slices_in_flight_are_bounded():
+    def read(stream_slice):
+        time.sleep(0.01)
+        yield parent_record(stream_slice)
+
+    parent = FakeParentStream(range(20), read)
+    child_slices = nested_stream(parent, workers=3).stream_slices(sync_mode=SyncMode.full_refresh)
+
+    first = next(child_slices)
+    # the slices are pulled from the parent as the walks complete, not all up front
+    assert parent.pulled <= 6
+    rest = list(child_slices)
+
+    assert parent.max_in_flight <= 3
+    assert sorted(child_slice["subresource_uri"] for child_slice in [first, *rest]) == sorted(f"/{i}/0/Addresses.json" for i in range(20))
+
+
+def test_parent_slices_are_yielded_as_they_complete():
+    release = Event()
+
+    def read(stream_slice):
+        if stream_slice == "slow":
+            release.wait(5)
+        yield parent_record(stream_slice)
+
+    parent = FakeParentStream(["slow", "fast"], read)
+    child_slices = nested_stream(parent, workers=2).stream_slices(sync_mode=SyncMode.full_refresh)
+
+    assert next(child_slices) == {"subresource_uri": "/fast/0/Addresses.json"}
+    release.set()
+    assert list(child_slices) == [{"subresource_uri": "/slow/0/Addresses.json"}]
+
+
+def endless(stream_slice, read_counts):
+    # long enough to be cut short, bounded so a walk that is not stopped fails the timing assertions instead of hanging
+    for index in range(2000):
+        read_counts[stream_slice] = index
+        yield parent_record(stream_slice, index)
+        time.sleep(0.001)
+
+
+def test_parent_slice_error_reaches_caller():
+    read_counts = {}
+
+    def read(stream_slice):
+        if stream_slice == "broken":
+            time.sleep(0.01)
+            raise ValueError("broken parent slice")
+        yield from endless(stream_slice, read_counts)
+
+    parent = FakeParentStream(["endless", "broken", "never"], read)
+    child_slices = nested_stream(parent, workers=2).stream_slices(sync_mode=SyncMode.full_refresh)
+
+    started = time.monotonic()
+    with pytest.raises(ValueError, match="broken parent slice"):
+        list(child_slices)
+
+    # the running walk is stopped instead of being read to its end
+    assert time.monotonic() - started < 1
+    assert parent.in_flight == 0
+    assert "never" not in read_counts
+
+
+def test_parent_walks_stop_on_close():
+    read_counts = {}
+
+    def read(stream_slice):
+        if stream_slice == "short":
+            yield parent_record(stream_slice)
+        else:
+            yield from endless(stream_slice, read_counts)
+
+    parent = FakeParentStream(["short", "endless", "next", "never"], read)
+    child_slices = nested_stream(parent, workers=2).stream_slices(sync_mode=SyncMode.full_refresh)
+
+    assert next(child_slices) == {"subresource_uri": "/short/0/Addresses.json"}
+    started = time.monotonic()
+    child_slices.close()
+
+    assert time.monotonic() - started < 1
+    assert parent.in_flight == 0
+    counts = dict(read_counts)
+    time.sleep(0.05)
+    assert read_counts == counts
+    assert "never" not in read_counts
+
+
+def mock_accounts(requests_mock):
+    accounts = [
+        {
+            "sid": sid,
+            "subresource_uris": {
+                "addresses": f"/2010-04-01/Accounts/{sid}/Addresses.json",
+                "applications": f"/2010-04-01/Accounts/{sid}/Applications.json",
+                "keys": f"/2010-04-01/Accounts/{sid}/Keys.json",
+                "calls": f"/2010-04-01/Accounts/{sid}/Calls.json",
+                "available_phone_numbers": f"/2010-04-01/Accounts/{sid}/AvailablePhoneNumbers.json",
+            },
+        }
+        for sid in ACCOUNT_SIDS
+    ]
+    return requests_mock.get("https://api.twilio.com/2010-04-01/Accounts.json", json={"accounts": accounts, "next_page_uri": None})
+
+
+def test_cached_parent_is_read_once_for_all_children(requests_mock):
+    accounts_request = mock_accounts(requests_mock)
+    accounts = Accounts()
+    children = [stream_cls(parent_instance=accounts) for stream_cls in [Addresses, Applications, Keys, Calls, UsageRecords]]
+
+    for child in children:
+        child_slices = list(child.stream_slices(sync_mode=SyncMode.full_refresh))
+        assert len(child_slices) == len(ACCOUNT_SIDS)
+
+    assert accounts_request.call_count == 1
+    assert list(children[0].stream_slices(sync_mode=SyncMode.full_refresh)) == [
+        {"subresource_uri": f"/2010-04-01/Accounts/{sid}/Addresses.json"} for sid in ACCOUNT_SIDS
+    ]
+    assert accounts_request.call_count == 1
+
+
+def test_cached_countries_are_read_once_for_all_available_phone_numbers(requests_mock):
+    accounts_request = mock_accounts(requests_mock)
+    countries_requests = {}
+    for sid in ACCOUNT_SIDS:
+        country_uri = f"/2010-04-01/Accounts/{sid}/AvailablePhoneNumbers/US"
+        countries = [
+            {
+                "country_code": "US",
+                "subresource_uris": {
+                    "local": f"{country_uri}/Local.json",
+                    "mobile": f"{country_uri}/Mobile.json",
+                    "toll_free": f"{country_uri}/TollFree.json",
+                },
+            }
+        ]
+        countries_requests[sid] = requests_mock.get(
+            f"https://api.twilio.com/2010-04-01/Accounts/{sid}/AvailablePhoneNumbers.json",
+            json={"countries": countries, "next_page_uri": None},
+        )
+    countries = AvailablePhoneNumberCountries(parent_instance=Accounts())
+
+    for stream_cls, kind in [
+        (AvailablePhoneNumbersLocal, "Local"),
+        (AvailablePhoneNumbersMobile, "Mobile"),
+        (AvailablePhoneNumbersTollFree, "TollFree"),
+    ]:
+        child_slices = list(stream_cls(parent_instance=countries).stream_slices(sync_mode=SyncMode.full_refresh))
+        assert child_slices == [
+            {"subresource_uri": f"/2010-04-01/Accounts/{sid}/AvailablePhoneNumbers/US/{kind}.json"} for sid in ACCOUNT_SIDS
+        ]
+
+    assert accounts_request.call_count == 1
+    assert [request.call_count for request in countries_requests.values()] == [1, 1]
+
+
+def test_path_follows_stream_name():
+    class RenamedAccounts(Accounts):
+        @property
+        def name(self):
+            return "renamed_accounts"
+
+    assert Accounts().path() == "Accounts.json"
+    assert RenamedAccounts().path() == "Renamed_Accounts.json"
+    assert Accounts().path() == "Accounts.json"